@@ -1,31 +1,127 @@
 import streamlit as st
-import chromadb
-from chromadb.utils import embedding_functions
-from pypdf import PdfReader
-import os
+import pandas as pd
+import html
+import math
+
+from pdf_extract import extract_text_from_pdf, read_pdf_bytes, pdf_hash
+from scan_contract import (
+    DB_PATH, DISTANCE_THRESHOLD, QUERY_BATCH_SIZE, load_collection, match_clauses,
+    is_risky, deviation_score
+)
 
 # 1. CONFIGURATION
-DB_PATH = "data/chroma_db"
-# We keep the stricter threshold we found worked best (0.35)
-DISTANCE_THRESHOLD = 0.35
+# The threshold lives in scan_contract.py so the app and the CLI always agree
+PAGE_SIZE = 20  # Findings rendered per page (and streamed live while scanning)
 
 # Set page layout to wide for better comparison view
 st.set_page_config(page_title="Legality AI Scanner", layout="wide")
 
 # 2. HELPER FUNCTIONS
-def extract_text_from_pdf(uploaded_file):
-    """Reads text from the uploaded PDF object"""
-    reader = PdfReader(uploaded_file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
-
 def split_into_clauses(text):
     """Splits text into analyzable chunks"""
     # Simple split by newline, filtering out empty/short lines
     return [line.strip() for line in text.split('\n') if len(line.strip()) > 30]
 
+@st.cache_resource
+def get_collection():
+    """Loads the DB and embedding model once per server, not on every rerun"""
+    return load_collection()
+
+def render_risk(number, risk):
+    """Side-by-side card for one finding"""
+    st.divider()
+
+    # Create columns for Side-by-Side comparison
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader(f"🚩 Risk #{number}: {risk['category']}")
+        st.markdown(f"**Deviates by:** `{risk['deviation']:.2f}%`")
+        # Visual red bar for risk
+        st.markdown(f"""
+        <div style="padding:10px; background-color:#ffe6e6; border-left:5px solid #ff4b4b; color: black;">
+            "{html.escape(risk['clause'])}"
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col2:
+        st.subheader("🛡️ Golden Standard Suggestion")
+        st.markdown("**Proposed Rewrite:**")
+        # Visual green bar for safe option
+        st.markdown(f"""
+        <div style="padding:10px; background-color:#e6fffa; border-left:5px solid #00cc96; color: black;">
+            {html.escape(risk['safe_rewrite'])}
+        </div>
+        """, unsafe_allow_html=True)
+
+def summarize_by_category(risks):
+    """One row per category: count and deviation stats"""
+    df = pd.DataFrame(risks)
+    summary = df.groupby('category')['deviation'].agg(['count', 'mean', 'max'])
+    summary.columns = ['Findings', 'Avg Deviation %', 'Max Deviation %']
+    return summary.sort_values('Findings', ascending=False).round(2)
+
+def scan_with_live_results(collection, clauses):
+    """Queries clause batches and streams the first page of findings as they arrive"""
+    progress_bar = st.progress(0)
+    summary_slot = st.empty()
+    live_slot = st.empty()
+    live_box = live_slot.container()
+
+    risks_found = []
+    for start in range(0, len(clauses), QUERY_BATCH_SIZE):
+        batch = clauses[start:start+QUERY_BATCH_SIZE]
+
+        for match in match_clauses(collection, batch):
+            # Check threshold
+            if is_risky(match):
+                risk = {
+                    "clause": match['clause'],
+                    "category": match['category'],
+                    "safe_rewrite": match['safe_rewrite'],
+                    "deviation": deviation_score(match)
+                }
+                risks_found.append(risk)
+                # Only the first page is drawn live; the rest waits for pagination
+                if len(risks_found) <= PAGE_SIZE:
+                    with live_box:
+                        render_risk(len(risks_found), risk)
+
+        progress_bar.progress(min(start + len(batch), len(clauses)) / len(clauses))
+        if risks_found:
+            summary_slot.dataframe(summarize_by_category(risks_found))
+
+    # Remove the live view; the paginated results replace it
+    progress_bar.empty()
+    summary_slot.empty()
+    live_slot.empty()
+    return risks_found
+
+def render_results(risks_found):
+    if len(risks_found) == 0:
+        st.balloons()
+        st.success("✅ **Clean Contract!** No significant deviations from the Golden Standard detected.")
+        return
+
+    st.error(f"🚨 **Scan Complete:** Found {len(risks_found)} Critical Deviations")
+
+    summary = summarize_by_category(risks_found)
+    st.dataframe(summary)
+
+    # --- FILTER & PAGINATION ---
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        categories = st.multiselect("Filter by category", list(summary.index), default=list(summary.index))
+    # Keep the original risk numbers so they stay stable across filters/pages
+    visible = [(i + 1, risk) for i, risk in enumerate(risks_found) if risk['category'] in categories]
+
+    num_pages = max(1, math.ceil(len(visible) / PAGE_SIZE))
+    with col2:
+        page = st.number_input(f"Page (of {num_pages})", min_value=1, max_value=num_pages, value=1)
+
+    for number, risk in visible[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]:
+        render_risk(number, risk)
+
 # 3. MAIN APP
 def main():
     # --- HEADER ---
@@ -47,83 +143,24 @@ def main():
     uploaded_file = st.file_uploader("📂 Drag and drop your contract here", type="pdf")
 
     if uploaded_file is not None:
-        # --- PROCESSING ---
-        with st.spinner("🔍 Reading document and vectorizing text..."):
-            # 1. Connect to Brain
-            client = chromadb.PersistentClient(path=DB_PATH)
-            sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-                model_name="all-MiniLM-L6-v2"
-            )
-            collection = client.get_collection(name="legal_risks", embedding_function=sentence_transformer_ef)
-
-            # 2. Analyze Text
-            text = extract_text_from_pdf(uploaded_file)
-            clauses = split_into_clauses(text)
-            
-            risks_found = []
-            
-            # Progress Bar
-            progress_bar = st.progress(0)
-            
-            for i, clause in enumerate(clauses):
-                # Update progress
-                progress_bar.progress((i + 1) / len(clauses))
-                
-                # Query DB
-                results = collection.query(
-                    query_texts=[clause],
-                    n_results=1,
-                    include=["metadatas", "distances"]
-                )
-                
-                distance = results['distances'][0][0]
-                
-                # Check threshold
-                if distance < DISTANCE_THRESHOLD:
-                    metadata = results['metadatas'][0][0]
-                    deviation_score = (1 - distance) * 100
-                    
-                    risks_found.append({
-                        "clause": clause,
-                        "category": metadata['category'],
-                        "safe_rewrite": metadata['safe_rewrite'],
-                        "deviation": deviation_score
-                    })
-
-            # --- DISPLAY RESULTS ---
-            progress_bar.empty() # Remove bar when done
-            
-            if len(risks_found) == 0:
-                st.balloons()
-                st.success("✅ **Clean Contract!** No significant deviations from the Golden Standard detected.")
-            else:
-                st.error(f"🚨 **Scan Complete:** Found {len(risks_found)} Critical Deviations")
-                
-                for i, risk in enumerate(risks_found):
-                    st.divider()
-                    
-                    # Create columns for Side-by-Side comparison
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.subheader(f"🚩 Risk #{i+1}: {risk['category']}")
-                        st.markdown(f"**Deviates by:** `{risk['deviation']:.2f}%`")
-                        # Visual red bar for risk
-                        st.markdown(f"""
-                        <div style="padding:10px; background-color:#ffe6e6; border-left:5px solid #ff4b4b; color: black;">
-                            "{risk['clause']}"
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                    with col2:
-                        st.subheader("🛡️ Golden Standard Suggestion")
-                        st.markdown("**Proposed Rewrite:**")
-                        # Visual green bar for safe option
-                        st.markdown(f"""
-                        <div style="padding:10px; background-color:#e6fffa; border-left:5px solid #00cc96; color: black;">
-                            {risk['safe_rewrite']}
-                        </div>
-                        """, unsafe_allow_html=True)
+        # Streamlit reruns the script on every widget change (e.g. turning a page),
+        # so results are kept per document instead of re-scanning each time
+        scan_key = f"scan_{pdf_hash(read_pdf_bytes(uploaded_file))}"
+
+        if scan_key not in st.session_state:
+            # --- PROCESSING ---
+            with st.spinner("🔍 Reading document and vectorizing text..."):
+                # 1. Connect to Brain
+                collection = get_collection()
+
+                # 2. Analyze Text
+                text = extract_text_from_pdf(uploaded_file)
+                clauses = split_into_clauses(text)
+
+            st.session_state[scan_key] = scan_with_live_results(collection, clauses) if clauses else []
+
+        # --- DISPLAY RESULTS ---
+        render_results(st.session_state[scan_key])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
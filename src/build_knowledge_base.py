@@ -1,14 +1,49 @@
 import pandas as pd
 import chromadb
 from chromadb.utils import embedding_functions
+import argparse
+import json
 import os
 
+from kb_snapshot import export_snapshot
+from scan_contract import DISTANCE_THRESHOLD
+
 # 1. SETUP PATHS
 RISKY_FILE = 'data/processed/risky_clauses_clean.json'
 SAFE_FILE = 'data/processed/step2_final_variations.json'
 DB_PATH = "data/chroma_db"  # Where the database will be saved on disk
+SNAPSHOT_DTYPE = "float16"  # Precision of the memory-mapped snapshot ("float32" for exact copies)
+SNAPSHOT_PCA_DIM = None     # e.g. 128 to store PCA-reduced vectors in the snapshot (None = full 384)
+
+# HNSW INDEX PARAMETERS
+# Chroma's defaults. tune_index.py writes its pick to INDEX_PARAMS_FILE, which overrides these.
+INDEX_PARAMS_FILE = "data/index_params.json"
+DEFAULT_INDEX_PARAMS = {
+    "hnsw:space": "l2",           # Changing this changes distances, so DISTANCE_THRESHOLD must be re-tuned
+    "hnsw:M": 16,                 # Graph links per node: more = better recall, more memory
+    "hnsw:construction_ef": 100,  # Build-time beam width: more = better graph, slower build
+    "hnsw:search_ef": 10          # Query-time beam width: more = better recall, slower queries
+}
+
+def load_index_params():
+    """Defaults, overridden by the tuned parameters file if one exists."""
+    params = dict(DEFAULT_INDEX_PARAMS)
+    if os.path.exists(INDEX_PARAMS_FILE):
+        with open(INDEX_PARAMS_FILE, 'r', encoding='utf-8') as f:
+            params.update(json.load(f))
+    return params
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the legal_risks vector database.")
+    parser.add_argument("--space", choices=["l2", "cosine", "ip"], help="Distance metric")
+    parser.add_argument("--M", type=int, help="HNSW links per node")
+    parser.add_argument("--construction-ef", type=int, help="HNSW build-time ef")
+    parser.add_argument("--search-ef", type=int, help="HNSW query-time ef")
+    parser.add_argument("--pca-dim", type=int, default=SNAPSHOT_PCA_DIM, help="Compress snapshot vectors to this many dims")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
     print("🚀 Building Knowledge Base (Vector Database)...")
 
     # 2. LOAD DATA
@@ -32,6 +67,22 @@ def main():
         model_name="all-MiniLM-L6-v2"
     )
 
+    # Index parameters: tuned file/defaults, then any command-line overrides
+    index_params = load_index_params()
+    overrides = {
+        "hnsw:space": args.space,
+        "hnsw:M": args.M,
+        "hnsw:construction_ef": args.construction_ef,
+        "hnsw:search_ef": args.search_ef
+    }
+    index_params.update({key: value for key, value in overrides.items() if value is not None})
+    print(f"   ⚙️ Index parameters: {index_params}")
+
+    # PCA + one distance scale only preserves squared-L2 decisions; cosine/ip need normalized vectors
+    if args.pca_dim and index_params["hnsw:space"] != "l2":
+        print(f"❌ --pca-dim needs the l2 space (got {index_params['hnsw:space']}). Use --pca-dim 0 or --space l2.")
+        return
+
     # Delete collection if it exists (so we start fresh)
     try:
         client.delete_collection(name="legal_risks")
@@ -40,7 +91,8 @@ def main():
 
     collection = client.create_collection(
         name="legal_risks",
-        embedding_function=sentence_transformer_ef
+        embedding_function=sentence_transformer_ef,
+        metadata=index_params
     )
 
     # 4. MERGE & INDEX
@@ -73,7 +125,9 @@ def main():
             metadatas.append({
                 "category": category,
                 "safe_rewrite": safe_text,
-                "risk_id": str(row_id)
+                "risk_id": str(row_id),
+                # Per-client playbook the clause belongs to (decides its shard)
+                "playbook": row.get('playbook', 'default')
             })
             ids.append(str(row_id))
             count += 1
@@ -89,8 +143,19 @@ def main():
         )
         print(f"   ✅ Indexed batch {i} - {i+batch_size}")
 
+    # 6. EXPORT SNAPSHOT
+    # A raw embedding file + metadata table that scanners can memory-map instead of loading the DB
+    # Optionally PCA-compressed; the snapshot then re-calibrates distances to DISTANCE_THRESHOLD
+    snapshot_path = export_snapshot(
+        collection,
+        dtype=SNAPSHOT_DTYPE,
+        pca_dim=args.pca_dim,
+        threshold=DISTANCE_THRESHOLD
+    )
+
     print(f"\n🎉 SUCCESS! Knowledge Base built with {count} entries.")
     print(f"📁 Database saved to: {DB_PATH}")
+    print(f"📦 Snapshot saved to: {snapshot_path}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
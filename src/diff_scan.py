@@ -0,0 +1,173 @@
+import argparse
+import difflib
+import json
+import os
+import re
+from collections import Counter
+
+from scan_contract import (
+    extract_text_from_pdf, split_into_clauses, load_collection,
+    match_clauses, is_risky, print_risk, kb_fingerprint
+)
+
+# CONFIGURATION
+# A scan result is a JSON file holding every clause of a version with its nearest risk.
+# Save one per redline (--save) and pass it as --old next time to skip re-scanning.
+# Results without a matching kb_fingerprint (older files too) are re-scanned.
+RESULT_VERSION = 1
+
+def normalize_clause(clause):
+    """Collapses whitespace/case so re-flowed PDF text still lines up."""
+    return re.sub(r'\s+', ' ', clause).strip().lower()
+
+def save_scan_result(path, source, matches, fingerprint):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "version": RESULT_VERSION,
+            "source": source,
+            "kb_fingerprint": fingerprint,
+            "matches": matches
+        }, f, indent=4)
+
+def load_scan_result(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        result = json.load(f)
+    if result.get('version') != RESULT_VERSION:
+        raise ValueError(f"Unsupported scan result version in {path}")
+    return result
+
+def diff_matches(collection, old_matches, new_clauses):
+    """Aligns the new clauses against the old scan and only queries the changed ones.
+
+    Returns (new_matches, blocks, rescanned) where blocks is a list of
+    (tag, old_slice, new_slice) from the clause alignment.
+    """
+    old_norm = [normalize_clause(m['clause']) for m in old_matches]
+    new_norm = [normalize_clause(c) for c in new_clauses]
+
+    # Any clause text already seen (even if it moved) can reuse its old match
+    known = {norm: m for norm, m in zip(old_norm, old_matches)}
+
+    new_matches = [None] * len(new_clauses)
+    to_scan = []
+    for i, norm in enumerate(new_norm):
+        if norm in known:
+            new_matches[i] = dict(known[norm], clause=new_clauses[i])
+        else:
+            to_scan.append(i)
+
+    if to_scan:
+        fresh = match_clauses(collection, [new_clauses[i] for i in to_scan])
+        for i, match in zip(to_scan, fresh):
+            new_matches[i] = match
+
+    matcher = difflib.SequenceMatcher(None, old_norm, new_norm, autojunk=False)
+    blocks = [
+        (tag, old_matches[i1:i2], new_matches[j1:j2])
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+    return new_matches, blocks, len(to_scan)
+
+def compare_risks(blocks):
+    """Splits the changed blocks into newly introduced and resolved risks.
+
+    Inside a modified block, a risk only counts as introduced/resolved if its
+    category was not already present on the other side, so a re-worded risky
+    clause is not reported twice. A clause that just moved is neither.
+    """
+    introduced, resolved = [], []
+    for tag, old_block, new_block in blocks:
+        old_risks = [m for m in old_block if is_risky(m)]
+        new_risks = [m for m in new_block if is_risky(m)]
+
+        old_counts = Counter(m['category'] for m in old_risks)
+        for m in new_risks:
+            if old_counts[m['category']] > 0:
+                old_counts[m['category']] -= 1
+            else:
+                introduced.append(m)
+
+        new_counts = Counter(m['category'] for m in new_risks)
+        for m in old_risks:
+            if new_counts[m['category']] > 0:
+                new_counts[m['category']] -= 1
+            else:
+                resolved.append(m)
+
+    # A risky clause that only moved shows up as introduced in one block and
+    # resolved in another; cancel those pairs by clause text
+    moved = (Counter(normalize_clause(m['clause']) for m in introduced)
+             & Counter(normalize_clause(m['clause']) for m in resolved))
+    return _drop_moved(introduced, moved), _drop_moved(resolved, moved)
+
+def _drop_moved(risks, moved):
+    remaining = Counter(moved)
+    kept = []
+    for m in risks:
+        norm = normalize_clause(m['clause'])
+        if remaining[norm] > 0:
+            remaining[norm] -= 1
+        else:
+            kept.append(m)
+    return kept
+
+def load_old_matches(collection, old_path, fingerprint):
+    """Reads a stored scan result, or scans the old PDF from scratch."""
+    if old_path.lower().endswith('.json'):
+        result = load_scan_result(old_path)
+        if result.get('kb_fingerprint') == fingerprint:
+            return result['matches']
+        # The knowledge base changed since that scan, so old distances are stale
+        print("⚠️ Knowledge base changed since the stored scan. Re-scanning old version.")
+        return match_clauses(collection, [m['clause'] for m in result['matches']])
+
+    old_clauses = split_into_clauses(extract_text_from_pdf(old_path))
+    return match_clauses(collection, old_clauses)
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-scan only the clauses changed between two contract versions.")
+    parser.add_argument("old", help="Previous version: a PDF or a stored scan result (.json)")
+    parser.add_argument("new", help="New version of the contract (PDF)")
+    parser.add_argument("--save", help="Write the new version's scan result to this .json path")
+    args = parser.parse_args()
+
+    for path in (args.old, args.new):
+        if not os.path.exists(path):
+            print(f"❌ Error: {path} not found.")
+            return
+
+    print(f"🚀 Diff-Scanning: {args.old} -> {args.new}...\n")
+
+    collection = load_collection()
+    fingerprint = kb_fingerprint(collection)
+
+    old_matches = load_old_matches(collection, args.old, fingerprint)
+    new_clauses = split_into_clauses(extract_text_from_pdf(args.new))
+
+    new_matches, blocks, rescanned = diff_matches(collection, old_matches, new_clauses)
+    introduced, resolved = compare_risks(blocks)
+
+    print(f"📄 {len(new_clauses)} clauses, {len(blocks)} changed blocks.")
+    print(f"   ♻️ Reused {len(new_clauses) - rescanned} findings, re-scanned {rescanned} clauses.")
+    print("-" * 60)
+
+    for match in introduced:
+        print("🆕 [NEW RISK]")
+        print_risk(match)
+
+    for match in resolved:
+        print(f"✅ [RESOLVED] {match['category']}: \"{match['clause'][:100]}...\"")
+    if resolved:
+        print("-" * 60)
+
+    total_risks = sum(1 for m in new_matches if is_risky(m))
+    print(f"🚨 Diff Complete. {len(introduced)} new, {len(resolved)} resolved, {total_risks} deviations in the new version.")
+
+    if args.save:
+        save_scan_result(args.save, args.new, new_matches, fingerprint)
+        print(f"📁 Scan result saved to: {args.save}")
+
+if __name__ == "__main__":
+    main()
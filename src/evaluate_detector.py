@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from scan_contract import DISTANCE_THRESHOLD, QUERY_BATCH_SIZE, load_collection
+
+# CONFIGURATION
+RISKY_FILE = 'data/processed/risky_clauses_clean.json'
+SAFE_FILE = 'data/processed/step2_final_variations.json'
+NEGATIVE_COLUMNS = ['safe_option_2', 'safe_option_3', 'safe_option_4', 'safe_option_5']
+THRESHOLDS = [round(t, 2) for t in np.arange(0.15, 0.61, 0.05)] + [DISTANCE_THRESHOLD]
+
+# Ordinary contract text that should never be flagged
+BOILERPLATE = [
+    "This Agreement shall be governed by and construed in accordance with the laws of the State of New York.",
+    "This Agreement may be executed in counterparts, each of which shall be deemed an original.",
+    "All notices under this Agreement shall be in writing and delivered to the addresses set forth above.",
+    "The headings in this Agreement are for convenience only and shall not affect its interpretation.",
+    "If any provision of this Agreement is held invalid, the remaining provisions shall continue in full force.",
+    "This Agreement constitutes the entire agreement between the parties and supersedes all prior agreements.",
+    "No amendment to this Agreement shall be effective unless made in writing and signed by both parties.",
+    "Neither party may assign this Agreement without the prior written consent of the other party.",
+    "The failure of either party to enforce any provision shall not constitute a waiver of that provision.",
+    "Payment shall be made within thirty (30) days of receipt of a valid invoice.",
+]
+
+# Scanner configurations to compare. Each entry returns an object with the collection query API.
+CONFIGS = {
+    "chroma": lambda: load_collection("chroma"),
+    "snapshot": lambda: load_collection("snapshot"),
+    "sharded": lambda: load_collection("sharded"),
+}
+
+def build_labeled_set(sample=None, seed=42):
+    """Positives: risky clauses (queried leave-one-out, so they can't match themselves).
+    Negatives: safe variations 2-5 (never indexed) plus generic boilerplate.
+
+    Returns a list of {"text", "label", "exclude_id"} items.
+    """
+    df_risky = pd.read_json(RISKY_FILE)
+    df_safe = pd.read_json(SAFE_FILE)
+
+    positives = []
+    for index, row in df_risky.iterrows():
+        row_id = row.get('id', index)
+        positives.append({"text": row['risky_clause'], "label": 1, "exclude_id": str(row_id)})
+
+    negatives = [{"text": text, "label": 0, "exclude_id": None} for text in BOILERPLATE]
+    for _, row in df_safe.iterrows():
+        for column in NEGATIVE_COLUMNS:
+            text = row.get(column, '')
+            if isinstance(text, str) and len(text.strip()) > 30:
+                negatives.append({"text": text.strip(), "label": 0, "exclude_id": None})
+
+    if sample:
+        rng = random.Random(seed)
+        positives = rng.sample(positives, min(sample, len(positives)))
+        negatives = rng.sample(negatives, min(sample, len(negatives)))
+    return positives + negatives
+
+def nearest_distances(collection, items, batch_size):
+    """Distance to the nearest knowledge-base entry that isn't the item itself.
+
+    Returns (distances, batch_latencies_in_seconds).
+    """
+    distances = []
+    latencies = []
+    for i in range(0, len(items), batch_size):
+        batch = items[i:i+batch_size]
+        start = time.perf_counter()
+        results = collection.query(
+            query_texts=[item['text'] for item in batch],
+            n_results=2,
+            include=["distances"]
+        )
+        latencies.append(time.perf_counter() - start)
+
+        for item, ids, dists in zip(batch, results['ids'], results['distances']):
+            kept = [d for hit_id, d in zip(ids, dists) if hit_id != item['exclude_id']]
+            distances.append(kept[0] if kept else float('inf'))
+    return np.array(distances), np.array(latencies)
+
+def sweep(distances, labels, thresholds=THRESHOLDS):
+    rows = []
+    for threshold in sorted(set(thresholds)):
+        predicted = distances < threshold
+        tp = int(np.sum(predicted & (labels == 1)))
+        fp = int(np.sum(predicted & (labels == 0)))
+        fn = int(np.sum(~predicted & (labels == 1)))
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        rows.append({"threshold": threshold, "precision": precision, "recall": recall, "f1": f1})
+    return rows
+
+def evaluate_config(name, items, batch_size):
+    collection = CONFIGS[name]()
+    # Warm-up so model/index loading isn't counted as query latency
+    collection.query(query_texts=[items[0]['text']], n_results=1, include=["distances"])
+
+    start = time.perf_counter()
+    distances, latencies = nearest_distances(collection, items, batch_size)
+    elapsed = time.perf_counter() - start
+
+    labels = np.array([item['label'] for item in items])
+    return {
+        "config": name,
+        "queries_per_sec": len(items) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "batch_size": batch_size,
+        "sweep": sweep(distances, labels)
+    }
+
+def print_report(report):
+    print(f"\n⚙️ {report['config']}: {report['queries_per_sec']:.1f} queries/sec | "
+          f"p50 {report['p50_ms']:.1f} ms | p95 {report['p95_ms']:.1f} ms (per batch of {report['batch_size']})")
+    print(f"   {'threshold':>9} {'precision':>9} {'recall':>7} {'f1':>6}")
+    best = max(report['sweep'], key=lambda row: row['f1'])
+    for row in report['sweep']:
+        marks = ("  ◀ current" if row['threshold'] == DISTANCE_THRESHOLD else "") + ("  ★ best F1" if row is best else "")
+        print(f"   {row['threshold']:>9.2f} {row['precision']:>9.3f} {row['recall']:>7.3f} {row['f1']:>6.3f}{marks}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Precision/recall vs latency for scanner configurations.")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=["chroma"], help="Configurations to evaluate")
+    parser.add_argument("--sample", type=int, default=None, help="Max positives and negatives each (default: all)")
+    parser.add_argument("--batch-size", type=int, default=QUERY_BATCH_SIZE, help="Clauses per query call (1 = per-clause latency)")
+    parser.add_argument("--output", help="Also write the full report as JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists(RISKY_FILE) or not os.path.exists(SAFE_FILE):
+        print("❌ Error: Input files not found. Check data/processed/")
+        return
+
+    items = build_labeled_set(args.sample)
+    n_pos = sum(item['label'] for item in items)
+    print(f"📊 Labeled set: {n_pos} risky (held out) vs {len(items) - n_pos} safe/boilerplate clauses.")
+
+    reports = []
+    for name in args.configs:
+        report = evaluate_config(name, items, args.batch_size)
+        print_report(report)
+        reports.append(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=4)
+        print(f"\n📁 Report saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
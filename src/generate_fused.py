@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import time
+import pandas as pd
+
+# 1. Setup (loads .env; the OpenAI client is built on first use)
+from llm_utils import MODEL_NAME, chat_completion, parse_json_response
+
+# Replaces step1 + step2: one structured call returns the safe rewrite AND its variations,
+# for several clauses at once. Writes both step files so build_knowledge_base.py works unchanged.
+INPUT_FILE = 'data/processed/risky_clauses_clean.json'
+STEP1_FILE = 'data/processed/step1_safe_clauses.json'
+OUTPUT_FILE = 'data/processed/step2_final_variations.json'
+
+CLAUSES_PER_REQUEST = 5  # Clauses packed into one call (1 = one call per clause)
+ITEM_RETRIES = 2         # Single-clause retries for entries missing/malformed in a batch reply
+NUM_VARIATIONS = 4
+TEMPERATURE = 0.5        # Between step1's 0.3 (rewrite) and step2's 0.7 (variations)
+
+def build_prompt(batch):
+    clauses = [
+        {"id": item['id'], "category": item['category'], "clause": item['risky_clause']}
+        for item in batch
+    ]
+    return f"""
+    You are an expert lawyer. For EACH risky clause below:
+    1. Rewrite it to be fair and safe, removing the unfair risk completely ("safe_clause").
+    2. Write {NUM_VARIATIONS} DIFFERENT variations of that safe clause using different words but
+       keeping the same legal meaning ("variations").
+
+    RULES:
+    - Output ONLY a JSON array with one object per clause, no extra text.
+    - Keep each clause's "id" exactly as given.
+    - Do NOT include the original risky clause or introductory text in any field.
+
+    Output Format:
+    [{{"id": <id>, "safe_clause": "...", "variations": ["...", "...", "...", "..."]}}]
+
+    RISKY CLAUSES:
+    {json.dumps(clauses, ensure_ascii=False, indent=2)}
+    """
+
+def validate_item(entry):
+    """Returns (safe_clause, variations) if the entry is usable, else None."""
+    if not isinstance(entry, dict):
+        return None
+    safe_clause = entry.get('safe_clause')
+    variations = entry.get('variations')
+    if not isinstance(safe_clause, str) or not safe_clause.strip():
+        return None
+    if not isinstance(variations, list):
+        return None
+    variations = [v.strip() for v in variations if isinstance(v, str) and v.strip()]
+    if len(variations) < NUM_VARIATIONS:
+        return None
+    return safe_clause.strip(), variations[:NUM_VARIATIONS]
+
+def generate_batch(batch):
+    """One request for the whole batch. Returns {id: (safe_clause, variations)} for valid entries."""
+    parsed = parse_json_response(chat_completion(build_prompt(batch), TEMPERATURE))
+    if isinstance(parsed, dict):
+        parsed = [parsed]  # A single-clause request may come back as a bare object
+    if not isinstance(parsed, list):
+        return {}
+
+    wanted = {str(item['id']) for item in batch}
+    results = {}
+    for entry in parsed:
+        valid = validate_item(entry)
+        key = str(entry.get('id')) if isinstance(entry, dict) else None
+        if valid and key in wanted:
+            results[key] = valid
+    # With one clause, a correct answer with a mangled id is still unambiguous
+    if len(batch) == 1 and not results and len(parsed) == 1 and validate_item(parsed[0]):
+        results[str(batch[0]['id'])] = validate_item(parsed[0])
+    return results
+
+def generate_with_retry(batch):
+    """Batched call, then per-item retries for anything the batch reply got wrong."""
+    results = generate_batch(batch)
+    for item in batch:
+        key = str(item['id'])
+        for attempt in range(ITEM_RETRIES):
+            if key in results:
+                break
+            print(f"   🔁 Retrying clause {key} on its own ({attempt + 1}/{ITEM_RETRIES})...")
+            results.update(generate_batch([item]))
+    return results
+
+def save(step1_rows, step2_rows):
+    pd.DataFrame(step1_rows).to_json(STEP1_FILE, orient='records', indent=4)
+    pd.DataFrame(step2_rows).to_json(OUTPUT_FILE, orient='records', indent=4)
+
+def load_existing(path):
+    if os.path.exists(path):
+        try:
+            return pd.read_json(path).to_dict('records')
+        except: pass
+    return []
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate safe rewrites and variations in one structured call per batch.")
+    parser.add_argument("--batch-size", type=int, default=CLAUSES_PER_REQUEST, help="Clauses per request")
+    args = parser.parse_args()
+
+    if not os.path.exists(INPUT_FILE):
+        print(f"❌ Error: {INPUT_FILE} not found.")
+        return
+
+    if not os.getenv("OPENROUTER_API_KEY"):
+        print("❌ Error: OPENROUTER_API_KEY is missing in .env file.")
+        return
+
+    df = pd.read_json(INPUT_FILE)
+    print(f"📄 Loaded {len(df)} risky clauses.")
+
+    # Resume: the step2 file is the finished product, so it decides what's done
+    step1_rows = load_existing(STEP1_FILE)
+    step2_rows = load_existing(OUTPUT_FILE)
+    processed_ids = {row['id'] for row in step2_rows if 'id' in row}
+    step1_rows = [row for row in step1_rows if row.get('id') in processed_ids]
+    if processed_ids:
+        print(f"🔄 Resuming... Found {len(processed_ids)} done.")
+
+    # Same ids as step1 (the row index), so build_knowledge_base.py can join them
+    pending = [
+        {"id": index, "category": row.get('risk_category', 'General'), "risky_clause": row['risky_clause']}
+        for index, row in df.iterrows()
+        if index not in processed_ids
+    ]
+
+    print(f"🚀 Fused generation ({MODEL_NAME}): {len(pending)} clauses, {args.batch_size} per request...")
+
+    failed = 0
+    for start in range(0, len(pending), args.batch_size):
+        batch = pending[start:start+args.batch_size]
+        results = generate_with_retry(batch)
+
+        for item in batch:
+            key = str(item['id'])
+            if key not in results:
+                failed += 1
+                print(f"   ⚠️ [{item['id']+1}/{len(df)}] Failed")
+                continue
+            safe_clause, variations = results[key]
+            step1_rows.append({"id": item['id'], "category": item['category'], "safe_clause_base": safe_clause})
+            entry = {"id": item['id'], "category": item['category'], "safe_option_1": safe_clause}
+            for n, variation in enumerate(variations, start=2):
+                entry[f"safe_option_{n}"] = variation
+            step2_rows.append(entry)
+
+        print(f"   ✅ [{min(start + len(batch), len(pending))}/{len(pending)}] Saved Safe Clauses + Variations")
+        save(step1_rows, step2_rows)
+
+        # Short pause
+        time.sleep(1)
+
+    # Final Save
+    save(step1_rows, step2_rows)
+    print(f"\n🎉 SUCCESS! Saved {len(step2_rows)} rows to: {OUTPUT_FILE} ({failed} failed)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,605 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# CONFIGURATION
+SNAPSHOT_DIR = "data/kb_snapshot"  # One sub-folder per version, CURRENT points at the live one
+FORMAT_VERSION = 2                 # 2: metadata columns are memory-mapped files, not one JSON table
+KEEP_SNAPSHOTS = 2                 # Versions kept on disk: the new one plus the one running scanners may still use
+MODEL_NAME = "all-MiniLM-L6-v2"
+SEARCH_BLOCK_ROWS = 8192           # Rows upcast to float32 at a time while searching
+CALIBRATION_SAMPLE = 2000          # Knowledge-base rows used to calibrate/report PCA compression
+SHARD_MEMORY_BUDGET_MB = 512       # Shard bytes kept open before least-recently-used shards are evicted
+DEFAULT_PLAYBOOK = "default"       # Playbook for knowledge-base rows that don't name one
+BENCH_CLAUSE = "The Service Provider shall be liable for all damages without any limitation or cap."
+
+# EXPORT (called by build_knowledge_base.py)
+def _slug(name):
+    # Readable and collision-free folder name for a category/playbook
+    readable = re.sub(r'[^a-z0-9]+', '-', str(name).lower()).strip('-')
+    return f"{readable}-{hashlib.sha1(str(name).encode('utf-8')).hexdigest()[:6]}"
+
+def _write_text_column(path, name, values):
+    """Strings as one utf-8 blob (<name>.bin) + int64 offsets (<name>.offsets.npy)."""
+    encoded = [str(value).encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    np.save(os.path.join(path, f"{name}.offsets.npy"), offsets)
+    with open(os.path.join(path, f"{name}.bin"), 'wb') as f:
+        f.write(b"".join(encoded))
+
+def _write_index(path, stored, metadatas, manifest):
+    """Writes one searchable index folder (the whole snapshot, or one shard)."""
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "embeddings.npy"), stored)
+    # Norms come from the stored precision so distances stay consistent with it
+    np.save(os.path.join(path, "sq_norms.npy"), np.square(stored.astype(np.float32)).sum(axis=1))
+
+    # Every column is a file the scanners memory-map, so N workers share one copy.
+    # Only the short category/playbook name lists live in metadata.json.
+    categories = sorted({m['category'] for m in metadatas})
+    playbooks = sorted({m.get('playbook', DEFAULT_PLAYBOOK) for m in metadatas})
+    category_codes = {name: code for code, name in enumerate(categories)}
+    playbook_codes = {name: code for code, name in enumerate(playbooks)}
+    np.save(os.path.join(path, "category.npy"),
+            np.array([category_codes[m['category']] for m in metadatas], dtype=np.int32))
+    np.save(os.path.join(path, "playbook.npy"),
+            np.array([playbook_codes[m.get('playbook', DEFAULT_PLAYBOOK)] for m in metadatas], dtype=np.int32))
+    _write_text_column(path, "risk_id", [m['risk_id'] for m in metadatas])
+    _write_text_column(path, "safe_rewrite", [m['safe_rewrite'] for m in metadatas])
+    with open(os.path.join(path, "metadata.json"), 'w', encoding='utf-8') as f:
+        json.dump({"categories": categories, "playbooks": playbooks}, f)
+
+    with open(os.path.join(path, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(dict(
+            manifest,
+            count=int(stored.shape[0]),
+            dim=int(stored.shape[1]) if stored.ndim == 2 else 0,
+            dtype=str(stored.dtype)
+        ), f, indent=4)
+
+def export_snapshot(collection, dtype="float16", snapshot_dir=SNAPSHOT_DIR, pca_dim=None, threshold=0.35, shards=True):
+    """Writes the collection's embeddings + metadata as a new versioned snapshot.
+
+    Layout of <snapshot_dir>/<version>/:
+        embeddings.npy  raw (count, dim) float16/float32 matrix, opened with mmap
+        sq_norms.npy    float32 squared norms, so search needs no extra pass
+        projection.npz  PCA mean/components, only when pca_dim is set
+        category.npy    int32 category codes   } names of the codes are in metadata.json
+        playbook.npy    int32 playbook codes   }
+        risk_id.*       text columns: .bin utf-8 blob + .offsets.npy row offsets
+        safe_rewrite.*
+        manifest.json   format version, shape, dtype, model name and distance scale
+        shards/         with shards=True, the same layout once per (playbook, category),
+                        listed in shards/index.json
+
+    With pca_dim (l2 space only), vectors are projected to pca_dim dimensions and a distance scale is
+    calibrated so `distance < threshold` keeps making the same calls as full vectors.
+    """
+    data = collection.get(include=["embeddings", "metadatas"])
+    embeddings = np.asarray(data['embeddings'], dtype=np.float32)
+    metadatas = data['metadatas']
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+
+    if pca_dim and space != "l2":
+        # Projected cosine/ip distances aren't a fixed multiple of the originals, so one
+        # calibrated scale can't keep the threshold's decisions
+        raise ValueError(f"pca_dim needs the l2 space; this collection uses {space!r}")
+
+    projection = None
+    distance_scale = 1.0
+    if pca_dim:
+        projection = fit_pca(embeddings, pca_dim)
+        reduced = project(embeddings, *projection)
+        # Calibrate on what the scanner will actually search: the stored precision
+        reduced = reduced.astype(dtype).astype(np.float32)
+        distance_scale = compression_report(embeddings, reduced, space, threshold, dtype)
+        stored = reduced.astype(dtype)
+    else:
+        stored = embeddings.astype(dtype)
+
+    digest = hashlib.sha256(stored.tobytes()).hexdigest()[:12]
+    # Microseconds keep names unique and in age order when the same content is rebuilt
+    # quickly; never write into an existing folder, readers may have it mapped
+    while True:
+        now = time.time()
+        version = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now % 1 * 1e6):06d}-{digest}"
+        path = os.path.join(snapshot_dir, version)
+        if not os.path.exists(path):
+            break
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "version": version,
+        "source_dim": int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+        "projection": projection is not None,
+        "model": MODEL_NAME,
+        # Same metric as the collection, so DISTANCE_THRESHOLD still applies
+        "space": space,
+        # Multiplies raw distances; 1.0 unless PCA compression re-calibrated it
+        "distance_scale": distance_scale
+    }
+    _write_index(path, stored, metadatas, manifest)
+    projection_file = os.path.join(path, "projection.npz")
+    if projection is not None:
+        np.savez(projection_file, mean=projection[0], components=projection[1])
+
+    if shards:
+        groups = {}
+        for row, m in enumerate(metadatas):
+            groups.setdefault((m.get('playbook', DEFAULT_PLAYBOOK), m['category']), []).append(row)
+
+        shard_list = []
+        for (playbook, category), rows in sorted(groups.items()):
+            shard_path = os.path.join(path, "shards", _slug(playbook), _slug(category))
+            _write_index(shard_path, stored[rows], [metadatas[r] for r in rows], dict(
+                manifest,
+                playbook=playbook,
+                category=category,
+                # Shards share the snapshot's projection instead of copying it
+                projection_file=os.path.relpath(projection_file, shard_path)
+            ))
+            shard_list.append({
+                "playbook": playbook,
+                "category": category,
+                "path": os.path.relpath(shard_path, path),
+                "count": len(rows),
+                # Everything the shard maps (vectors, norms, metadata columns), for the LRU budget
+                "bytes": sum(os.path.getsize(os.path.join(shard_path, name)) for name in os.listdir(shard_path))
+            })
+        with open(os.path.join(path, "shards", "index.json"), 'w', encoding='utf-8') as f:
+            json.dump({"format_version": FORMAT_VERSION, "version": version, "shards": shard_list}, f, indent=4)
+
+    # Swap the pointer atomically so running scanners never open a half-written snapshot
+    pointer_tmp = os.path.join(snapshot_dir, "CURRENT.tmp")
+    with open(pointer_tmp, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(snapshot_dir, "CURRENT"))
+
+    prune_snapshots(snapshot_dir, keep=KEEP_SNAPSHOTS)
+    return path
+
+def pin_snapshot(path):
+    """Marks a version as in use by this process, so prune_snapshots leaves it alone.
+
+    Needed by readers that open files after start-up (ShardedIndex opens shards lazily
+    and re-opens them after LRU eviction). The marker is the process id; it stops
+    counting once that process exits.
+    """
+    readers = os.path.join(path, "readers")
+    os.makedirs(readers, exist_ok=True)
+    open(os.path.join(readers, str(os.getpid())), 'w').close()
+
+def _is_pinned(path):
+    readers = os.path.join(path, "readers")
+    if not os.path.isdir(readers):
+        return False
+    for name in os.listdir(readers):
+        try:
+            os.kill(int(name), 0)
+            return True
+        except PermissionError:
+            return True   # Alive, owned by another user
+        except (ValueError, ProcessLookupError):
+            continue
+    return False
+
+def prune_snapshots(snapshot_dir=SNAPSHOT_DIR, keep=KEEP_SNAPSHOTS):
+    """Deletes all but the newest `keep` versions (never CURRENT or a pinned one).
+
+    Version folders start with a timestamp, so name order is age order. A plain
+    SnapshotIndex maps all its files when opened, so it survives deletion (Linux frees
+    the files once unmapped); a ShardedIndex opens files later and pins its version.
+    """
+    current = os.path.basename(current_snapshot_path(snapshot_dir) or "")
+    versions = sorted(
+        name for name in os.listdir(snapshot_dir)
+        if os.path.isfile(os.path.join(snapshot_dir, name, "manifest.json"))
+    )
+    for name in versions[:-keep] if keep > 0 else versions:
+        if name != current and not _is_pinned(os.path.join(snapshot_dir, name)):
+            shutil.rmtree(os.path.join(snapshot_dir, name), ignore_errors=True)
+
+def chroma_distances(q, q_sq, block, block_sq, space="l2"):
+    """Chroma's distance for each space: squared L2, 1 - cosine or 1 - inner product.
+
+    q_sq/block_sq are the squared row norms of q/block.
+    """
+    dots = q @ block.T
+    if space == "cosine":
+        norms = np.sqrt(q_sq)[:, None] * np.sqrt(block_sq)[None, :]
+        return 1 - dots / np.maximum(norms, 1e-12)
+    if space == "ip":
+        return 1 - dots
+    # Clamp tiny negatives from float error on (near-)identical vectors
+    return np.maximum(q_sq[:, None] + block_sq[None, :] - 2 * dots, 0)
+
+# PCA COMPRESSION
+def fit_pca(embeddings, dim):
+    """Returns (mean, components) of the top `dim` principal directions."""
+    mean = embeddings.mean(axis=0)
+    centered = embeddings - mean
+    # Eigen-decomposition of the (dim x dim) covariance is cheap even for huge knowledge bases
+    eigenvalues, eigenvectors = np.linalg.eigh(centered.T @ centered)
+    components = eigenvectors[:, np.argsort(eigenvalues)[::-1][:dim]].T
+    return mean.astype(np.float32), components.astype(np.float32)
+
+def project(x, mean, components):
+    return (np.asarray(x, dtype=np.float32) - mean) @ components.T
+
+def _nearest_other(x, rows, space):
+    """Leave-one-out nearest neighbour of x[rows] within x. Returns (distances, indices, seconds)."""
+    start = time.perf_counter()
+    sq = np.square(x).sum(axis=1)
+    distances, indices = [], []
+    for i in range(0, len(rows), 256):
+        r = rows[i:i+256]
+        d = chroma_distances(x[r], sq[r], x, sq, space)
+        d[np.arange(len(r)), r] = np.inf
+        best = d.argmin(axis=1)
+        indices.append(best)
+        distances.append(d[np.arange(len(r)), best])
+    return np.concatenate(distances), np.concatenate(indices), time.perf_counter() - start
+
+def compression_report(full, reduced, space, threshold, dtype="float16", sample=CALIBRATION_SAMPLE, seed=42):
+    """Prints the size/speed/recall trade-off and returns the calibrated distance scale.
+
+    Uses each sampled knowledge-base row's nearest *other* row as the query workload.
+    The scale is the one that best reproduces full-vector `distance < threshold` calls;
+    if the sample has no calls on one side, it falls back to a least-squares fit.
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(full), size=min(sample, len(full)), replace=False)
+    full_d, full_nn, full_s = _nearest_other(full, rows, space)
+    red_d, red_nn, red_s = _nearest_other(reduced, rows, space)
+
+    truth = full_d < threshold
+    if truth.any() and not truth.all():
+        candidates = np.quantile(red_d, np.linspace(0, 1, 401))
+        agreement = ((red_d[None, :] < candidates[:, None]) == truth[None, :]).mean(axis=1)
+        reduced_threshold = candidates[np.argmax(agreement)]
+        scale = float(threshold / reduced_threshold) if reduced_threshold > 0 else 1.0
+    else:
+        scale = float(np.dot(full_d, red_d) / max(np.dot(red_d, red_d), 1e-12))
+
+    recall = float(np.mean(red_nn == full_nn))
+    decisions = float(np.mean((red_d * scale < threshold) == truth))
+    full_mb = full.shape[0] * full.shape[1] * 4 / 1e6
+    reduced_mb = reduced.shape[0] * reduced.shape[1] * np.dtype(dtype).itemsize / 1e6
+
+    print(f"   🗜️ PCA {full.shape[1]} -> {reduced.shape[1]} dims (sample of {len(rows)} clauses):")
+    print(f"      size:      {full_mb:.2f} MB float32 -> {reduced_mb:.2f} MB {dtype}")
+    print(f"      search:    {full_s * 1000:.1f} ms -> {red_s * 1000:.1f} ms")
+    print(f"      recall@1:  {recall:.3f} (same nearest neighbour as full vectors)")
+    print(f"      threshold: scale {scale:.3f}, {decisions:.1%} of risk calls unchanged")
+    return scale
+
+# READ SIDE (used by the scanners)
+class MiniLMEmbedder:
+    """Embeds text with sentence-transformers directly (no chromadb import)."""
+    def __init__(self, model_name=MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def __call__(self, texts):
+        return self.model.encode(list(texts), convert_to_numpy=True)
+
+class TextColumn:
+    """Read-only list of strings backed by a memory-mapped utf-8 blob + offsets."""
+    def __init__(self, path, name):
+        self.offsets = np.load(os.path.join(path, f"{name}.offsets.npy"), mmap_mode='r')
+        blob_file = os.path.join(path, f"{name}.bin")
+        # np.memmap can't map an empty file
+        self.blob = (np.memmap(blob_file, dtype=np.uint8, mode='r')
+                     if os.path.getsize(blob_file) else np.zeros(0, dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        return self.blob[self.offsets[row]:self.offsets[row + 1]].tobytes().decode('utf-8')
+
+class SnapshotIndex:
+    """Read-only, memory-mapped stand-in for the `legal_risks` Chroma collection.
+
+    Implements the subset of the collection API the scanners use (`query`, `count`),
+    so it can be passed anywhere a collection is expected. The embedding matrix and
+    the metadata columns are mapped, not read, so every process opening the same
+    snapshot shares one copy through the OS page cache.
+    """
+    def __init__(self, path, embedding_function=None):
+        with open(os.path.join(path, "manifest.json"), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format in {path}")
+
+        self.path = path
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode='r')
+        self.sq_norms = np.load(os.path.join(path, "sq_norms.npy"), mmap_mode='r')
+
+        # Compressed snapshots project queries into the same reduced space
+        self.projection = None
+        if self.manifest.get('projection'):
+            projection_file = self.manifest.get('projection_file', "projection.npz")
+            with np.load(os.path.join(path, projection_file)) as saved:
+                self.projection = (saved['mean'], saved['components'])
+        self.distance_scale = self.manifest.get('distance_scale', 1.0)
+
+        with open(os.path.join(path, "metadata.json"), 'r', encoding='utf-8') as f:
+            names = json.load(f)
+        self.categories = names['categories']
+        self.playbooks = names['playbooks']
+        self.category_codes = np.load(os.path.join(path, "category.npy"), mmap_mode='r')
+        self.playbook_codes = np.load(os.path.join(path, "playbook.npy"), mmap_mode='r')
+        self.risk_ids = TextColumn(path, "risk_id")
+        self.safe_rewrites = TextColumn(path, "safe_rewrite")
+
+        self._embedding_function = embedding_function
+
+    @property
+    def embedding_function(self):
+        # Built on first query so opening a snapshot stays a file open
+        if self._embedding_function is None:
+            self._embedding_function = MiniLMEmbedder(self.manifest['model'])
+        return self._embedding_function
+
+    def count(self):
+        return self.manifest['count']
+
+    def fingerprint(self):
+        """Identifies the knowledge-base contents: snapshot versions are content-hashed."""
+        return f"snapshot:{self.manifest['version']}"
+
+    def metadata(self, row):
+        return {
+            "category": self.categories[self.category_codes[row]],
+            "safe_rewrite": self.safe_rewrites[row],
+            "risk_id": self.risk_ids[row],
+            "playbook": self.playbooks[self.playbook_codes[row]]
+        }
+
+    def search(self, query_embeddings, n_results=1):
+        """Exact top-k search. Returns (distances, rows), both (queries, k)."""
+        q = np.asarray(query_embeddings, dtype=np.float32)
+        if self.projection is not None:
+            q = project(q, *self.projection)
+        q_sq = np.square(q).sum(axis=1)
+        k = min(n_results, self.count())
+
+        best_d = np.empty((len(q), 0), dtype=np.float32)
+        best_i = np.empty((len(q), 0), dtype=np.int64)
+        for start in range(0, self.count(), SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.embeddings[start:start+SEARCH_BLOCK_ROWS], dtype=np.float32)
+            block_sq = self.sq_norms[start:start+len(block)]
+            d = chroma_distances(q, q_sq, block, block_sq, self.manifest.get('space', 'l2'))
+            rows = np.broadcast_to(np.arange(start, start + len(block)), d.shape)
+
+            cand_d = np.concatenate([best_d, d], axis=1)
+            cand_i = np.concatenate([best_i, rows], axis=1)
+            keep = np.argpartition(cand_d, k - 1, axis=1)[:, :k]
+            best_d = np.take_along_axis(cand_d, keep, axis=1)
+            best_i = np.take_along_axis(cand_i, keep, axis=1)
+
+        order = np.argsort(best_d, axis=1)
+        best_d = np.take_along_axis(best_d, order, axis=1) * self.distance_scale
+        best_i = np.take_along_axis(best_i, order, axis=1)
+        return best_d, best_i
+
+    def query(self, query_texts=None, n_results=1, include=("metadatas", "distances"), query_embeddings=None):
+        if query_embeddings is None:
+            query_embeddings = self.embedding_function(query_texts)
+        distances, rows = self.search(query_embeddings, n_results)
+        return {
+            "ids": [[self.risk_ids[r] for r in row] for row in rows],
+            "distances": distances.tolist() if "distances" in include else None,
+            "metadatas": [[self.metadata(r) for r in row] for row in rows] if "metadatas" in include else None
+        }
+
+def current_snapshot_path(snapshot_dir=SNAPSHOT_DIR):
+    pointer = os.path.join(snapshot_dir, "CURRENT")
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, 'r', encoding='utf-8') as f:
+        return os.path.join(snapshot_dir, f.read().strip())
+
+def open_snapshot(snapshot_dir=SNAPSHOT_DIR, embedding_function=None):
+    path = current_snapshot_path(snapshot_dir)
+    if path is None:
+        raise FileNotFoundError(f"No snapshot in {snapshot_dir}. Run build_knowledge_base.py first.")
+    return SnapshotIndex(path, embedding_function)
+
+class ShardedIndex:
+    """The snapshot split per (playbook, category), with shards opened on first use.
+
+    Only shards matching `categories`/`playbooks` are searched, and results are merged
+    across them. Open shards are kept in LRU order; once their combined size passes
+    `memory_budget_mb` the least recently used ones are closed, so memory stays flat
+    however many playbooks exist. (Shards are memory-mapped, so "open" means pages the
+    OS may keep resident; closing drops the mapping.)
+    """
+    def __init__(self, path, categories=None, playbooks=None,
+                 memory_budget_mb=SHARD_MEMORY_BUDGET_MB, embedding_function=None):
+        with open(os.path.join(path, "shards", "index.json"), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported shard index format in {path}")
+
+        self.path = path
+        self.all_shards = index['shards']
+        self.shards = [
+            shard for shard in self.all_shards
+            if (categories is None or shard['category'] in categories)
+            and (playbooks is None or shard['playbook'] in playbooks)
+        ]
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self._open = OrderedDict()  # shard path -> SnapshotIndex, least recently used first
+        self._open_bytes = 0
+        self._embedding_function = embedding_function
+        # Shards are opened lazily, so the version must outlive later rebuilds
+        pin_snapshot(path)
+
+    @property
+    def embedding_function(self):
+        if self._embedding_function is None:
+            with open(os.path.join(self.path, "manifest.json"), 'r', encoding='utf-8') as f:
+                self._embedding_function = MiniLMEmbedder(json.load(f)['model'])
+        return self._embedding_function
+
+    def count(self):
+        return sum(shard['count'] for shard in self.shards)
+
+    def fingerprint(self):
+        # Same version but a different shard selection can give different nearest matches
+        selected = ",".join(sorted(shard['path'] for shard in self.shards))
+        return f"sharded:{os.path.basename(self.path)}:{selected}"
+
+    def _shard(self, shard):
+        key = shard['path']
+        if key in self._open:
+            self._open.move_to_end(key)
+            return self._open[key]
+
+        index = SnapshotIndex(os.path.join(self.path, key), embedding_function=self.embedding_function)
+        self._open[key] = index
+        self._open_bytes += shard['bytes']
+        # Always keep the shard just opened, even if it alone exceeds the budget
+        while self._open_bytes > self.memory_budget and len(self._open) > 1:
+            evicted_key, _ = self._open.popitem(last=False)
+            self._open_bytes -= next(s['bytes'] for s in self.all_shards if s['path'] == evicted_key)
+        return index
+
+    def _visit_order(self):
+        """Already-open shards first (most recent first), then the rest.
+
+        A fixed order would re-open every evicted shard on each query once the
+        selection exceeds the budget; this way each query opens only what's missing.
+        """
+        selected = {shard['path']: shard for shard in self.shards}
+        open_now = [selected[key] for key in reversed(self._open) if key in selected]
+        return open_now + [shard for shard in self.shards if shard['path'] not in self._open]
+
+    def query(self, query_texts=None, n_results=1, include=("metadatas", "distances"), query_embeddings=None):
+        if query_embeddings is None:
+            query_embeddings = self.embedding_function(query_texts)
+        num_queries = len(query_embeddings)
+
+        # Per query: the best (distance, risk_id, metadata) so far. Hits are resolved while
+        # their shard is open, so nothing here keeps an evicted shard alive.
+        best = [[] for _ in range(num_queries)]
+        for shard in self._visit_order():
+            index = self._shard(shard)
+            distances, rows = index.search(query_embeddings, n_results)
+            for q in range(num_queries):
+                hits = best[q] + [
+                    (distance, index.risk_ids[row], index.metadata(row) if "metadatas" in include else None)
+                    for distance, row in zip(distances[q].tolist(), rows[q].tolist())
+                ]
+                best[q] = sorted(hits, key=lambda hit: hit[0])[:n_results]
+
+        return {
+            "ids": [[risk_id for _, risk_id, _ in hits] for hits in best],
+            "distances": [[d for d, _, _ in hits] for hits in best] if "distances" in include else None,
+            "metadatas": [[m for _, _, m in hits] for hits in best] if "metadatas" in include else None
+        }
+
+def open_sharded(snapshot_dir=SNAPSHOT_DIR, categories=None, playbooks=None, embedding_function=None):
+    path = current_snapshot_path(snapshot_dir)
+    if path is None or not os.path.exists(os.path.join(path, "shards", "index.json")):
+        raise FileNotFoundError(f"No sharded snapshot in {snapshot_dir}. Run build_knowledge_base.py first.")
+    return ShardedIndex(path, categories=categories, playbooks=playbooks, embedding_function=embedding_function)
+
+# BENCHMARK: startup time and memory, each backend in a fresh process
+def _memory_mb():
+    """Peak RSS, plus the anonymous (private) part when /proc is available."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    anon = None
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    anon = int(line.split()[1]) / 1024
+    return peak, anon
+
+def _bench_child(backend):
+    t0 = time.perf_counter()
+    if backend == "chroma":
+        import chromadb
+        from chromadb.utils import embedding_functions
+        ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=MODEL_NAME)
+        t1 = time.perf_counter()
+        client = chromadb.PersistentClient(path="data/chroma_db")
+        collection = client.get_collection(name="legal_risks", embedding_function=ef)
+    else:
+        ef = MiniLMEmbedder()
+        t1 = time.perf_counter()
+        collection = open_snapshot(embedding_function=ef)
+    t2 = time.perf_counter()
+    # Chroma loads the HNSW index lazily, so the first query is part of startup
+    collection.query(query_texts=[BENCH_CLAUSE], n_results=1, include=["metadatas", "distances"])
+    t3 = time.perf_counter()
+
+    peak, anon = _memory_mb()
+    print(json.dumps({
+        "model_s": t1 - t0,
+        "open_s": t2 - t1,
+        "first_query_s": t3 - t2,
+        "peak_rss_mb": peak,
+        "anon_rss_mb": anon
+    }))
+
+def run_benchmark():
+    print("⏱️ Comparing Chroma vs memory-mapped snapshot (fresh process each)...")
+    print("-" * 60)
+    for backend in ("chroma", "snapshot"):
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--bench-child", backend],
+            capture_output=True, text=True
+        )
+        if out.returncode != 0:
+            print(f"❌ {backend}: {out.stderr.strip().splitlines()[-1] if out.stderr.strip() else 'failed'}")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        anon = f"{r['anon_rss_mb']:.1f} MB" if r['anon_rss_mb'] is not None else "n/a"
+        print(f"   {backend:<9} model {r['model_s']:.2f}s | open {r['open_s']*1000:.1f} ms | "
+              f"first query {r['first_query_s']*1000:.1f} ms | peak RSS {r['peak_rss_mb']:.1f} MB | private {anon}")
+    print("-" * 60)
+    print("   Snapshot embeddings and metadata columns are file-backed and shared between processes;")
+    print("   only 'private' memory (mostly the embedding model) grows per worker.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or benchmark the memory-mapped knowledge base snapshot.")
+    parser.add_argument("--benchmark", action="store_true", help="Compare startup time and RSS against Chroma")
+    parser.add_argument("--bench-child", choices=["chroma", "snapshot"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.bench_child:
+        _bench_child(args.bench_child)
+        return
+
+    path = current_snapshot_path()
+    if path is None:
+        print(f"❌ No snapshot in {SNAPSHOT_DIR}. Run build_knowledge_base.py first.")
+        return
+
+    index = SnapshotIndex(path)
+    m = index.manifest
+    print(f"📦 Snapshot {m['version']}: {m['count']} x {m['dim']} {m['dtype']} ({len(index.categories)} categories)")
+    if os.path.exists(os.path.join(path, "shards", "index.json")):
+        for shard in ShardedIndex(path).all_shards:
+            print(f"   🧩 [{shard['playbook']}] {shard['category']}: {shard['count']} clauses, {shard['bytes'] / 1e6:.2f} MB")
+
+    if args.benchmark:
+        run_benchmark()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import json
+import os
+import re
+import time
+from dotenv import load_dotenv
+
+# 1. Setup
+load_dotenv()
+
+# 🔴 CONFIGURATION: Use Llama 4 Maverick, free Llama 3 when credits run out
+MODEL_NAME = "meta-llama/Llama-4-Maverick-17B-128E-Instruct"
+FALLBACK_MODEL = "meta-llama/llama-3.1-8b-instruct:free"
+
+# The OpenAI client is built on first use (see get_client), so importing this
+# module or failing input validation doesn't pay for it
+_client = None
+
+def get_client():
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(
+            base_url="https://openrouter.ai/api/v1",
+            api_key=os.getenv("OPENROUTER_API_KEY"),
+        )
+    return _client
+
+def chat_completion(prompt, temperature, model=MODEL_NAME):
+    """One chat call with the pipeline's usual retry rules.
+
+    429 (rate limit) waits and retries, 402 (no credits) switches to the free model,
+    anything else gives up. Returns the reply text, or None.
+    """
+    for attempt in range(3):
+        try:
+            print(f"   ...Sending to {model}...", end="\r")
+            completion = get_client().chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature
+            )
+            return completion.choices[0].message.content.strip()
+
+        except Exception as e:
+            print(f"   ⚠️ Error: {e}")
+            if "402" in str(e) and model != FALLBACK_MODEL:
+                print("   ⚠️ No credits. Switching to Free Model...")
+                return chat_completion(prompt, temperature, model=FALLBACK_MODEL)
+            if "429" in str(e):
+                time.sleep(10)
+            else:
+                return None
+    return None
+
+def parse_numbered_list(content, limit=None):
+    """Items of a "1. ..." / "2) ..." list, ignoring any text around it."""
+    items = []
+    for line in content.split('\n'):
+        found = re.match(r'^\s*\d+\s*[\.\)]\s*(.+)$', line)
+        if found:
+            item = found.group(1).strip().strip('"').strip()
+            if item:
+                items.append(item)
+    return items[:limit] if limit else items
+
+def parse_json_response(content):
+    """First JSON object / list of objects in a model reply; tolerates ``` fences and chatter. None if there is none."""
+    if not content:
+        return None
+    text = content.strip()
+    fenced = re.search(r'```(?:json)?\s*(.*?)```', text, re.S)
+    if fenced:
+        text = fenced.group(1).strip()
+
+    # Chatter like "[Note] ..." or "{id} below" may come first, so try every bracket
+    # until one decodes to the shapes the pipeline uses: an object or a list of objects
+    decoder = json.JSONDecoder()
+    for start, char in enumerate(text):
+        if char not in '[{':
+            continue
+        try:
+            value, _ = decoder.raw_decode(text[start:])
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict) or (isinstance(value, list) and value and all(isinstance(v, dict) for v in value)):
+            return value
+    return None
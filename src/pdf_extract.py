@@ -0,0 +1,217 @@
+import argparse
+import hashlib
+import io
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+# CONFIGURATION
+CACHE_DIR = "data/cache/pdf_text"  # Extracted text, keyed by the PDF's SHA-256
+PAGES_PER_CHUNK = 4                # Page range handed to one worker task
+PARALLEL_MIN_PAGES = 8             # Below this, process start-up costs more than it saves
+PAGE_TIMEOUT = 10                  # Seconds before a single page is skipped
+CHUNK_TIMEOUT_SLACK = 15           # Extra seconds per chunk (worker start-up, PDF parse) before it is abandoned
+
+# Each worker parses the PDF once and keeps it here for all its chunks
+_worker_reader = None
+
+class PageTimeout(BaseException):
+    # BaseException so pypdf's own `except Exception` blocks can't swallow it
+    pass
+
+def _raise_timeout(signum, frame):
+    raise PageTimeout()
+
+def _extract_page(page, page_timeout):
+    """Returns (text, timed_out) for one page.
+
+    The timeout relies on SIGALRM, so it is only enforced on the main thread of
+    a process (always true inside pool workers; extract_pages sends other threads there).
+    """
+    use_alarm = (
+        page_timeout
+        and hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    try:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, page_timeout)
+        return page.extract_text() or "", False
+    except PageTimeout:
+        return "", True
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+def _init_worker(pdf_bytes):
+    global _worker_reader
+    from pypdf import PdfReader
+    _worker_reader = PdfReader(io.BytesIO(pdf_bytes))
+
+def _extract_page_range(start, stop, page_timeout):
+    results = []
+    for page_no in range(start, stop):
+        text, timed_out = _extract_page(_worker_reader.pages[page_no], page_timeout)
+        results.append((page_no, text, timed_out))
+    return results
+
+def read_pdf_bytes(source):
+    """Accepts a file path or a file-like object (e.g. a Streamlit upload)."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read()
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+def pdf_hash(pdf_bytes):
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+def _cache_path(digest):
+    return os.path.join(CACHE_DIR, f"{digest}.txt")
+
+def _kill_pool(pool, processes):
+    pool.shutdown(wait=False, cancel_futures=True)
+    # shutdown() can't stop a task already running, so end the workers themselves
+    for process in processes:
+        process.terminate()
+
+def _extract_chunks(pdf_bytes, chunks, workers, page_timeout):
+    """Runs page ranges in worker processes, with a deadline per chunk as a backstop.
+
+    SIGALRM can't interrupt a page stuck inside C code (e.g. zlib inflating a
+    FlateDecode stream), and a crashed worker breaks the whole pool. The stuck or
+    crashing chunk's pages are reported as timed out, the pool is killed, and the
+    chunks that hadn't finished are retried in a fresh pool.
+    """
+    from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+    from concurrent.futures.process import BrokenProcessPool
+
+    # Fork from a threaded server can copy held locks into the child; start clean workers instead
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+    results = []
+    pending = chunks
+    isolate = False  # After a crash: one chunk per pool, so a crash points at its chunk
+    while pending:
+        batch = pending[:1] if isolate else pending
+        pool = ProcessPoolExecutor(max_workers=1 if isolate else min(workers, len(batch)), mp_context=context,
+                                   initializer=_init_worker, initargs=(pdf_bytes,))
+        futures = [pool.submit(_extract_page_range, start, stop, page_timeout) for start, stop in batch]
+        # Kept now: a broken pool forgets its workers, even ones still stuck in a page
+        processes = list(pool._processes.values())
+        done = set()
+        failed = False
+        for n, ((start, stop), future) in enumerate(zip(batch, futures)):
+            # Chunks are waited on in submission order, so this one has a worker by now
+            deadline = page_timeout * (stop - start) + CHUNK_TIMEOUT_SLACK if page_timeout else None
+            try:
+                results.extend(future.result(timeout=deadline))
+                done.add(n)
+                continue
+            except FutureTimeout:
+                failed = True
+            except BrokenProcessPool:
+                failed = True
+                if len(batch) > 1:
+                    isolate = True  # Any running chunk could have killed the pool
+                    break
+            results.extend((page_no, "", True) for page_no in range(start, stop))
+            done.add(n)
+            break
+
+        if not failed:
+            pool.shutdown()
+        else:
+            _kill_pool(pool, processes)
+            for n, future in enumerate(futures):
+                if n not in done and future.done() and not future.cancelled() and future.exception() is None:
+                    results.extend(future.result())
+                    done.add(n)
+        pending = [chunk for n, chunk in enumerate(batch) if n not in done] + pending[len(batch):]
+    return results
+
+def extract_pages(pdf_bytes, workers=None, page_timeout=PAGE_TIMEOUT):
+    """Extracts every page, in order. Returns (page_texts, timed_out_page_numbers)."""
+    # Imported here so CLIs that only validate arguments don't pay for pypdf
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    num_pages = len(reader.pages)
+    workers = workers or os.cpu_count() or 1
+    # SIGALRM only works on a main thread, so off it (e.g. in Streamlit) even small
+    # PDFs go to a worker process, where the per-page timeout is enforced
+    can_time_out = not page_timeout or threading.current_thread() is threading.main_thread()
+
+    if can_time_out and (num_pages < PARALLEL_MIN_PAGES or workers == 1):
+        results = [
+            (page_no, *_extract_page(page, page_timeout))
+            for page_no, page in enumerate(reader.pages)
+        ]
+    else:
+        chunks = [
+            (start, min(start + PAGES_PER_CHUNK, num_pages))
+            for start in range(0, num_pages, PAGES_PER_CHUNK)
+        ]
+        results = _extract_chunks(pdf_bytes, chunks, min(workers, len(chunks)), page_timeout)
+
+    results.sort(key=lambda item: item[0])
+    texts = [text for _, text, _ in results]
+    timed_out = [page_no + 1 for page_no, _, flag in results if flag]
+    return texts, timed_out
+
+def extract_text_from_pdf(source, workers=None, page_timeout=PAGE_TIMEOUT, use_cache=True):
+    """Drop-in replacement for the old sequential extractor, with caching by PDF hash."""
+    pdf_bytes = read_pdf_bytes(source)
+    digest = pdf_hash(pdf_bytes)
+    cache_file = _cache_path(digest)
+
+    if use_cache and os.path.exists(cache_file):
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    texts, timed_out = extract_pages(pdf_bytes, workers=workers, page_timeout=page_timeout)
+    text = "".join(page_text + "\n" for page_text in texts)
+
+    if timed_out:
+        # Don't cache partial text; a later run with a longer timeout should retry these pages
+        print(f"⚠️ Skipped page(s) {timed_out}: extraction took longer than {page_timeout}s.")
+    elif use_cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    return text
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract text from a PDF using parallel page workers.")
+    parser.add_argument("pdf", help="PDF to extract")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--page-timeout", type=float, default=PAGE_TIMEOUT, help="Seconds allowed per page")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and don't write the text cache")
+    parser.add_argument("--output", help="Write the extracted text to this file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.pdf):
+        print(f"❌ Error: {args.pdf} not found.")
+        return
+
+    start = time.perf_counter()
+    text = extract_text_from_pdf(args.pdf, workers=args.workers, page_timeout=args.page_timeout, use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"📁 Text saved to: {args.output}")
+    print(f"✅ Extracted {len(text)} characters in {elapsed:.2f}s.")
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,193 @@
-import chromadb
-from chromadb.utils import embedding_functions
-from pypdf import PdfReader
+import argparse
 import os
+import time
+from contextlib import contextmanager
+
+# Heavy libraries (chromadb, sentence-transformers, pypdf) are imported inside the
+# functions that need them, so --help and bad arguments return instantly.
+from pdf_extract import extract_text_from_pdf
 
 # CONFIGURATION
 DB_PATH = "data/chroma_db"
 INPUT_PDF = "data/test_files/risky_contract.pdf"
 DISTANCE_THRESHOLD = 0.35
+QUERY_BATCH_SIZE = 32  # Clauses sent to the DB per query call
+BACKEND = "chroma"     # "chroma", "snapshot" or "sharded" (memory-mapped exports, see kb_snapshot.py)
+
+# Risk categories worth checking per contract type (--contract-type, sharded backend only)
+CONTRACT_TYPE_CATEGORIES = {
+    "nda": ["Non-Compete"],
+    "services": ["Unilateral Termination", "Unlimited Liability"],
+    "employment": ["Non-Compete", "Unilateral Termination"],
+}
+
+# Startup/phase timings collected by `timed`, printed with --timing
+TIMINGS = []
 
-def extract_text_from_pdf(pdf_path):
-    reader = PdfReader(pdf_path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
+@contextmanager
+def timed(label):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        TIMINGS.append((label, time.perf_counter() - start))
+
+def print_timings():
+    print("⏱️ Timing breakdown:")
+    for label, seconds in TIMINGS:
+        print(f"   {seconds * 1000:>9.1f} ms | {label}")
+    print(f"   {sum(s for _, s in TIMINGS) * 1000:>9.1f} ms | total")
+    print("   (For per-module import detail run: python -X importtime src/scan_contract.py ...)")
 
 def split_into_clauses(text):
     clauses = [line.strip() for line in text.split('\n') if len(line.strip()) > 30]
     return clauses
 
-def main():
-    print(f"🚀 Scanning Contract: {INPUT_PDF}...\n")
-    
+def load_collection(backend=BACKEND, categories=None, playbooks=None):
+    """Connects to the persisted knowledge base.
+
+    categories/playbooks restrict which shards are searched (sharded backend only).
+    """
+    if backend == "sharded":
+        with timed("import kb_snapshot"):
+            from kb_snapshot import open_sharded, MiniLMEmbedder
+        with timed("load embedding model"):
+            embedder = MiniLMEmbedder()
+        with timed("open shard index"):
+            return open_sharded(categories=categories, playbooks=playbooks, embedding_function=embedder)
+
+    if backend == "snapshot":
+        with timed("import kb_snapshot"):
+            from kb_snapshot import open_snapshot, MiniLMEmbedder
+        with timed("load embedding model"):
+            embedder = MiniLMEmbedder()
+        with timed("open snapshot"):
+            return open_snapshot(embedding_function=embedder)
+
+    with timed("import chromadb"):
+        import chromadb
+        from chromadb.utils import embedding_functions
+    with timed("load embedding model"):
+        sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
+            model_name="all-MiniLM-L6-v2"
+        )
+    with timed("open database"):
+        client = chromadb.PersistentClient(path=DB_PATH)
+        return client.get_collection(name="legal_risks", embedding_function=sentence_transformer_ef)
+
+def kb_fingerprint(collection):
+    """A string that changes whenever the knowledge base's contents or index settings do.
+
+    Snapshots already carry a content-hashed version; for Chroma the ids, documents,
+    metadata and collection settings are hashed.
+    """
+    if hasattr(collection, "fingerprint"):
+        return collection.fingerprint()
+    import hashlib
+    import json
+    data = collection.get(include=["documents", "metadatas"])
+    rows = sorted(zip(data['ids'], data['documents'], data['metadatas']), key=lambda row: row[0])
+    payload = json.dumps([collection.metadata, rows], sort_keys=True, default=str)
+    return "chroma:" + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def match_clauses(collection, clauses):
+    """Finds the closest known risk for every clause.
+
+    Returns one match per clause (same order) holding the raw distance, so the
+    threshold can be re-applied later without touching the DB again.
+    """
+    matches = []
+    for i in range(0, len(clauses), QUERY_BATCH_SIZE):
+        batch = clauses[i:i+QUERY_BATCH_SIZE]
+        results = collection.query(
+            query_texts=batch,
+            n_results=1,
+            include=["metadatas", "distances"]
+        )
+        for clause, distances, metadatas in zip(batch, results['distances'], results['metadatas']):
+            matches.append({
+                "clause": clause,
+                "distance": distances[0],
+                "category": metadatas[0]['category'],
+                "safe_rewrite": metadatas[0]['safe_rewrite']
+            })
+    return matches
+
+def is_risky(match):
+    return match['distance'] < DISTANCE_THRESHOLD
+
+def deviation_score(match):
+    # MATHEMATICAL LOGIC:
+    # If the clause is very close to a "Risky Clause", it has a High Deviation from the Standard.
+    # Deviation % = Similarity to Risk %
+    return (1 - match['distance']) * 100
+
+def print_risk(match):
+    print(f"🚩 [RISK DETECTED]")
+    # 🔴 EXACT OUTPUT FORMAT REQUESTED
+    print(f"   📈 DEVIATION FROM GOLDEN STANDARD: {deviation_score(match):.2f}%")
+    print(f"   🔻 RISKY CLAUSE: \"{match['clause']}\"")
+    print(f"   ⚠️ CATEGORY:     {match['category']}")
+    print(f"   🛡️ GOLDEN STD:   \"{match['safe_rewrite'][:100]}...\"")
+    print("-" * 60)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scan a contract PDF for deviations from the Golden Standard.")
+    parser.add_argument("pdf", nargs="?", default=INPUT_PDF, help=f"Contract to scan (default: {INPUT_PDF})")
+    parser.add_argument("--backend", choices=["chroma", "snapshot", "sharded"], default=BACKEND, help="Knowledge base to query")
+    parser.add_argument("--categories", nargs="+", help="Only check these risk categories (sharded backend)")
+    parser.add_argument("--contract-type", choices=list(CONTRACT_TYPE_CATEGORIES), help="Shortcut for --categories (sharded backend)")
+    parser.add_argument("--playbooks", nargs="+", help="Only check these client playbooks (sharded backend)")
+    parser.add_argument("--timing", action="store_true", help="Print a startup/phase timing breakdown")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # 0. VALIDATE INPUTS (before any heavy import or model load)
+    if not os.path.exists(args.pdf):
+        print(f"❌ PDF not found: {args.pdf}")
+        return
+
+    categories = args.categories
+    if args.contract_type:
+        categories = sorted(set(categories or []) | set(CONTRACT_TYPE_CATEGORIES[args.contract_type]))
+    if (categories or args.playbooks) and args.backend != "sharded":
+        print("❌ --categories/--contract-type/--playbooks need --backend sharded.")
+        return
+
+    print(f"🚀 Scanning Contract: {args.pdf}...\n")
+
     # 1. CONNECT TO DATABASE
-    client = chromadb.PersistentClient(path=DB_PATH)
-    sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"
-    )
-    collection = client.get_collection(name="legal_risks", embedding_function=sentence_transformer_ef)
-
-    if not os.path.exists(INPUT_PDF):
-        print("❌ PDF not found.")
+    collection = load_collection(args.backend, categories=categories, playbooks=args.playbooks)
+    if collection.count() == 0:
+        print("❌ No knowledge-base entries match the selected categories/playbooks.")
         return
-    
-    full_text = extract_text_from_pdf(INPUT_PDF)
+
+    with timed("extract text"):
+        full_text = extract_text_from_pdf(args.pdf)
     clauses = split_into_clauses(full_text)
-    
+
     print(f"📄 Analyzing {len(clauses)} clauses for Golden Standard deviations...")
     print("-" * 60)
 
     risks_found = 0
-    
-    for i, clause in enumerate(clauses):
-        results = collection.query(
-            query_texts=[clause],
-            n_results=1,
-            include=["metadatas", "distances"]
-        )
-        
-        distance = results['distances'][0][0]
-        metadata = results['metadatas'][0][0]
-        
-        # MATHEMATICAL LOGIC:
-        # If the clause is very close to a "Risky Clause", it has a High Deviation from the Standard.
-        # Deviation % = Similarity to Risk %
-        deviation_score = (1 - distance) * 100
-        
-        if distance < DISTANCE_THRESHOLD:
+
+    with timed("query clauses"):
+        matches = match_clauses(collection, clauses)
+
+    for match in matches:
+        if is_risky(match):
             risks_found += 1
-            print(f"🚩 [RISK DETECTED]")
-            # 🔴 EXACT OUTPUT FORMAT REQUESTED
-            print(f"   📈 DEVIATION FROM GOLDEN STANDARD: {deviation_score:.2f}%")
-            print(f"   🔻 RISKY CLAUSE: \"{clause}\"")
-            print(f"   ⚠️ CATEGORY:     {metadata['category']}")
-            print(f"   🛡️ GOLDEN STD:   \"{metadata['safe_rewrite'][:100]}...\"")
-            print("-" * 60)
+            print_risk(match)
 
     if risks_found == 0:
         print("✅ Contract aligns with Golden Standard. No deviations detected.")
     else:
         print(f"🚨 Scan Complete. Found {risks_found} deviations from the Golden Standard.")
 
+    if args.timing:
+        print_timings()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
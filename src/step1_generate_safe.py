@@ -1,28 +1,13 @@
 import os
 import time
 import pandas as pd
-from openai import OpenAI
-from dotenv import load_dotenv
 
-# 1. Setup
-load_dotenv()
-api_key = os.getenv("OPENROUTER_API_KEY")
-
-if not api_key:
-    print("❌ Error: OPENROUTER_API_KEY is missing in .env file.")
-    exit()
-
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=api_key,
-)
+# 1. Setup (loads .env; the OpenAI client is built on first use)
+from llm_utils import chat_completion
 
 INPUT_FILE = 'data/processed/risky_clauses_clean.json'
 OUTPUT_FILE = 'data/processed/step1_safe_clauses.json'
 
-# 🔴 CONFIGURATION: Use Llama 4 Maverick
-MODEL_NAME = "meta-llama/Llama-4-Maverick-17B-128E-Instruct"
-
 def generate_safe_clause(risky_text, category):
     prompt = f"""
     You are an expert lawyer. Rewrite this "{category}" clause to be fair and safe.
@@ -38,47 +23,18 @@ def generate_safe_clause(risky_text, category):
     SAFE REWRITE:
     """
     
-    # Retry logic (3 attempts)
-    for attempt in range(3):
-        try:
-            print(f"   ...Sending to {MODEL_NAME}...", end="\r")
-            
-            completion = client.chat.completions.create(
-                model=MODEL_NAME,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3
-            )
-            return completion.choices[0].message.content.strip()
-            
-        except Exception as e:
-            print(f"   ⚠️ Error: {e}")
-            if "402" in str(e): # Insufficient credits
-                print("   ❌ CRITICAL: Account has no credits. Switching to Free Model.")
-                # Fallback to free model if Maverick fails
-                return generate_fallback(prompt)
-            if "429" in str(e): # Rate limit
-                time.sleep(10)
-            else:
-                return None
-    return None
-
-def generate_fallback(prompt):
-    """Fallback to free Llama 3 if Maverick fails"""
-    try:
-        completion = client.chat.completions.create(
-            model="meta-llama/llama-3.1-8b-instruct:free",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
-        )
-        return completion.choices[0].message.content.strip()
-    except:
-        return None
+    # Retries on rate limits, falls back to the free model when credits run out
+    return chat_completion(prompt, 0.3)
 
 def main():
     if not os.path.exists(INPUT_FILE):
         print(f"❌ Error: {INPUT_FILE} not found.")
         return
 
+    if not os.getenv("OPENROUTER_API_KEY"):
+        print("❌ Error: OPENROUTER_API_KEY is missing in .env file.")
+        return
+
     # Load input
     df = pd.read_json(INPUT_FILE)
     print(f"📄 Loaded {len(df)} risky clauses.")
@@ -1,29 +1,14 @@
 import os
 import time
 import pandas as pd
-from openai import OpenAI
-from dotenv import load_dotenv
 
-# 1. Setup
-load_dotenv()
-api_key = os.getenv("OPENROUTER_API_KEY")
-
-if not api_key:
-    print("❌ Error: OPENROUTER_API_KEY is missing.")
-    exit()
-
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=api_key,
-)
+# 1. Setup (loads .env; the OpenAI client is built on first use)
+from llm_utils import chat_completion, parse_numbered_list
 
 # 🔴 UPDATED FILE NAMES
 INPUT_FILE = 'data/processed/step1_safe_clauses.json'
 OUTPUT_FILE = 'data/processed/step2_final_variations.json'
 
-# 🔴 CONFIGURATION: Use Llama 4 Maverick
-MODEL_NAME = "meta-llama/Llama-4-Maverick-17B-128E-Instruct"
-
 def generate_variations(safe_text):
     prompt = f"""
     Read this safe legal clause: "{safe_text}"
@@ -39,57 +24,19 @@ def generate_variations(safe_text):
     Output ONLY the numbered list. No extra text.
     """
     
-    for attempt in range(3):
-        try:
-            print(f"   ...Expanding via {MODEL_NAME}...", end="\r")
-            completion = client.chat.completions.create(
-                model=MODEL_NAME, 
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7 
-            )
-            content = completion.choices[0].message.content.strip()
-            
-            # Parse the numbered list
-            variations = []
-            for line in content.split('\n'):
-                # Look for lines starting with "1.", "2.", etc.
-                if line.strip() and line.strip()[0].isdigit() and "." in line[:3]:
-                    variations.append(line.split('.', 1)[-1].strip())
-            
-            return variations[:4] # Ensure we get exactly up to 4
-            
-        except Exception as e:
-            if "402" in str(e): # Credits run out -> Switch to free
-                 print("   ⚠️ No credits. Switching to Free Model...")
-                 return generate_variations_fallback(prompt)
-            if "429" in str(e):
-                time.sleep(10)
-            else:
-                return []
-    return []
-
-def generate_variations_fallback(prompt):
-    """Fallback to free Llama 3 if Maverick fails"""
-    try:
-        completion = client.chat.completions.create(
-            model="meta-llama/llama-3.1-8b-instruct:free", 
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7
-        )
-        content = completion.choices[0].message.content.strip()
-        variations = []
-        for line in content.split('\n'):
-            if line.strip() and line.strip()[0].isdigit() and "." in line[:3]:
-                variations.append(line.split('.', 1)[-1].strip())
-        return variations[:4]
-    except:
-        return []
+    # Retries on rate limits, falls back to the free model when credits run out
+    content = chat_completion(prompt, 0.7)
+    return parse_numbered_list(content, limit=4) if content else [] # Ensure we get exactly up to 4
 
 def main():
     if not os.path.exists(INPUT_FILE):
         print("❌ Error: Run Step 1 first!")
         return
 
+    if not os.getenv("OPENROUTER_API_KEY"):
+        print("❌ Error: OPENROUTER_API_KEY is missing.")
+        return
+
     # Check resume
     existing_data = []
     if os.path.exists(OUTPUT_FILE):
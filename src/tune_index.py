@@ -0,0 +1,221 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import chromadb
+from chromadb.utils import embedding_functions
+
+from build_knowledge_base import DB_PATH, INDEX_PARAMS_FILE, load_index_params
+from evaluate_detector import RISKY_FILE, SAFE_FILE, build_labeled_set
+from kb_snapshot import chroma_distances
+from scan_contract import QUERY_BATCH_SIZE
+
+# CONFIGURATION
+# Candidate HNSW settings. search_ef is tried in ascending order and stops at the
+# first value that meets the target, since a larger ef is never cheaper.
+M_GRID = [8, 16, 32]
+CONSTRUCTION_EF_GRID = [64, 100, 200]
+SEARCH_EF_GRID = [10, 20, 40, 80, 160]
+TARGET_RECALL = 0.99
+SAMPLE_SIZE = 500   # Query clauses used for measuring (never-indexed safe variations + boilerplate)
+ADD_BATCH = 1000    # Vectors per add() call when building candidate indexes
+
+def exact_nearest(corpus, queries, space):
+    """Ground truth: exact distance to the nearest corpus vector for each query."""
+    corpus_sq = np.square(corpus).sum(axis=1)
+    best = []
+    for i in range(0, len(queries), 256):
+        q = queries[i:i+256]
+        d = chroma_distances(q, np.square(q).sum(axis=1), corpus, corpus_sq, space)
+        best.append(d.min(axis=1))
+    return np.concatenate(best)
+
+def recall_at_1(found, exact):
+    # A hit is any neighbour as close as the true nearest one, so duplicate vectors don't count as misses
+    return float((np.asarray(found) <= exact + 1e-5).mean())
+
+def measure_graph(space, m, construction_ef, corpus, queries, exact, target_recall):
+    """Builds one HNSW graph for (M, construction_ef) and sweeps search_ef on it.
+
+    Uses hnswlib (chroma-hnswlib, installed with chromadb: the same index Chroma
+    runs), where ef is a query-time setting. Returns [(search_ef, recall, p50_ms)].
+    """
+    import hnswlib
+    index = hnswlib.Index(space=space, dim=corpus.shape[1])
+    index.init_index(max_elements=len(corpus), ef_construction=construction_ef, M=m)
+    index.add_items(corpus, np.arange(len(corpus)))
+
+    swept = []
+    for search_ef in SEARCH_EF_GRID:
+        index.set_ef(search_ef)
+        found = []
+        latencies = []
+        for i in range(0, len(queries), QUERY_BATCH_SIZE):
+            start = time.perf_counter()
+            _, distances = index.knn_query(queries[i:i+QUERY_BATCH_SIZE], k=1)
+            latencies.append(time.perf_counter() - start)
+            found.extend(distances[:, 0].tolist())
+        recall = recall_at_1(found, exact)
+        swept.append((search_ef, recall, float(np.percentile(latencies, 50) * 1000)))
+        if recall >= target_recall:
+            break
+    return swept
+
+def measure(client, params, ids, corpus, queries, exact):
+    """Builds a throwaway Chroma index with `params` and returns (recall@1, p50 ms per batch).
+
+    Fallback for when hnswlib can't be imported: Chroma fixes search_ef when the
+    collection is created, so every search_ef needs its own build.
+    """
+    name = f"tune_{params['hnsw:M']}_{params['hnsw:construction_ef']}_{params['hnsw:search_ef']}"
+    collection = client.create_collection(name=name, metadata=params, embedding_function=None)
+    for i in range(0, len(ids), ADD_BATCH):
+        collection.add(ids=ids[i:i+ADD_BATCH], embeddings=corpus[i:i+ADD_BATCH].tolist())
+
+    found = []
+    latencies = []
+    for i in range(0, len(queries), QUERY_BATCH_SIZE):
+        start = time.perf_counter()
+        results = collection.query(
+            query_embeddings=queries[i:i+QUERY_BATCH_SIZE].tolist(),
+            n_results=1,
+            include=["distances"]
+        )
+        latencies.append(time.perf_counter() - start)
+        found.extend(d[0] for d in results['distances'])
+    client.delete_collection(name=name)
+    return recall_at_1(found, exact), float(np.percentile(latencies, 50) * 1000)
+
+def chroma_sweep(client, space, m, construction_ef, ids, corpus, queries, exact, target_recall):
+    """Same contract as measure_graph, one Chroma build per search_ef."""
+    swept = []
+    for search_ef in SEARCH_EF_GRID:
+        params = {
+            "hnsw:space": space,
+            "hnsw:M": m,
+            "hnsw:construction_ef": construction_ef,
+            "hnsw:search_ef": search_ef
+        }
+        recall, p50_ms = measure(client, params, ids, corpus, queries, exact)
+        swept.append((search_ef, recall, p50_ms))
+        if recall >= target_recall:
+            break
+    return swept
+
+def tune(corpus, queries, space, target_recall):
+    """Returns (best_params, all_results). best_params is None if nothing met the target."""
+    exact = exact_nearest(corpus, queries, space)
+    try:
+        import hnswlib
+        client = None
+    except ImportError:
+        print("   ⚠️ hnswlib not importable; rebuilding a Chroma collection per search_ef (slower).")
+        ids = [str(i) for i in range(len(corpus))]
+        client = chromadb.EphemeralClient()
+
+    results = []
+    for m in M_GRID:
+        for construction_ef in CONSTRUCTION_EF_GRID:
+            if client is None:
+                swept = measure_graph(space, m, construction_ef, corpus, queries, exact, target_recall)
+            else:
+                swept = chroma_sweep(client, space, m, construction_ef, ids, corpus, queries, exact, target_recall)
+            for search_ef, recall, p50_ms in swept:
+                params = {
+                    "hnsw:space": space,
+                    "hnsw:M": m,
+                    "hnsw:construction_ef": construction_ef,
+                    "hnsw:search_ef": search_ef
+                }
+                results.append({"params": params, "recall_at_1": recall, "p50_ms": p50_ms})
+                print(f"   M={m:<3} construction_ef={construction_ef:<4} search_ef={search_ef:<4} "
+                      f"recall@1={recall:.3f}  p50={p50_ms:.2f} ms")
+
+    passing = [r for r in results if r['recall_at_1'] >= target_recall]
+    if not passing:
+        return None, results
+    # Cheapest = fastest queries; ties go to the smaller graph (less memory)
+    best = min(passing, key=lambda r: (round(r['p50_ms'], 2), r['params']['hnsw:M']))
+    return best, results
+
+def apply_params(params):
+    """Rebuilds the live collection with new index parameters, reusing stored embeddings."""
+    client = chromadb.PersistentClient(path=DB_PATH)
+    sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
+        model_name="all-MiniLM-L6-v2"
+    )
+    live = client.get_collection(name="legal_risks", embedding_function=sentence_transformer_ef)
+    data = live.get(include=["embeddings", "documents", "metadatas"])
+
+    client.delete_collection(name="legal_risks")
+    collection = client.create_collection(
+        name="legal_risks",
+        embedding_function=sentence_transformer_ef,
+        metadata=params
+    )
+    embeddings = np.asarray(data['embeddings'], dtype=np.float32)
+    for i in range(0, len(data['ids']), ADD_BATCH):
+        collection.add(
+            ids=data['ids'][i:i+ADD_BATCH],
+            embeddings=embeddings[i:i+ADD_BATCH].tolist(),
+            documents=data['documents'][i:i+ADD_BATCH],
+            metadatas=data['metadatas'][i:i+ADD_BATCH]
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the cheapest HNSW settings that meet a recall@1 target.")
+    parser.add_argument("--target-recall", type=float, default=TARGET_RECALL, help="Minimum recall@1 vs exact search")
+    parser.add_argument("--sample", type=int, default=SAMPLE_SIZE, help="Number of query clauses")
+    parser.add_argument("--apply", action="store_true", help="Rebuild legal_risks with the chosen settings now")
+    args = parser.parse_args()
+
+    if not os.path.exists(RISKY_FILE) or not os.path.exists(SAFE_FILE):
+        print("❌ Error: Input files not found. Check data/processed/")
+        return
+
+    print("🚀 Tuning HNSW index parameters...")
+    client = chromadb.PersistentClient(path=DB_PATH)
+    sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
+        model_name="all-MiniLM-L6-v2"
+    )
+    live = client.get_collection(name="legal_risks", embedding_function=sentence_transformer_ef)
+    corpus = np.asarray(live.get(include=["embeddings"])['embeddings'], dtype=np.float32)
+    # The metric is a modelling choice (it sets what DISTANCE_THRESHOLD means), so it is kept, not tuned
+    space = (live.metadata or {}).get("hnsw:space", load_index_params()["hnsw:space"])
+
+    # Only clauses that aren't in the index: an indexed clause finds itself at distance 0,
+    # which any graph gets right and would inflate recall@1
+    texts = [item['text'] for item in build_labeled_set(args.sample) if item['label'] == 0]
+    queries = np.asarray(sentence_transformer_ef(texts), dtype=np.float32)
+    print(f"   📄 {len(corpus)} indexed clauses, {len(queries)} sample queries, space={space}")
+    print("-" * 60)
+
+    best, _ = tune(corpus, queries, space, args.target_recall)
+    print("-" * 60)
+    if best is None:
+        print(f"❌ No setting reached recall@1 >= {args.target_recall}. Extend the grids in tune_index.py.")
+        return
+
+    # Tuning results travel with the parameters, so they end up in the collection metadata
+    params = dict(best['params'])
+    params["tuned:recall_at_1"] = best['recall_at_1']
+    params["tuned:p50_ms"] = best['p50_ms']
+    params["tuned:target_recall"] = args.target_recall
+    params["tuned:kb_size"] = len(corpus)
+
+    os.makedirs(os.path.dirname(INDEX_PARAMS_FILE), exist_ok=True)
+    with open(INDEX_PARAMS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(params, f, indent=4)
+    print(f"✅ Chosen: {best['params']} (recall@1={best['recall_at_1']:.3f}, p50={best['p50_ms']:.2f} ms)")
+    print(f"📁 Saved to: {INDEX_PARAMS_FILE}")
+
+    if args.apply:
+        apply_params(params)
+        print("🔁 Rebuilt legal_risks with the tuned parameters.")
+    else:
+        print("   Run build_knowledge_base.py (or re-run with --apply) to use them.")
+
+if __name__ == "__main__":
+    main()